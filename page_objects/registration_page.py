@@ -1,11 +1,109 @@
 import datetime
 
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+ELEMENT_SELECTORS = {
+    "first_name": "input#firstName",
+    "last_name": "input#lastName",
+    "email": "#userEmail",
+    "mobile": "input#userNumber",
+    "date_of_birth": "#dateOfBirthInput",
+    "picture": "input#uploadPicture",
+    "subjects": "input#subjectsInput",
+    "address": "textarea#currentAddress",
+    "state": "#state input[type='text']",
+    "city": "#city input[type='text']",
+}
+
+# Plain inputs that can be filled by setting their value, without keyboard events.
+# Mobile isn't one of them: browsers only check minlength (tooShort) after a user edit,
+# so a too short number set from a script would pass validation.
+TEXT_FIELDS = ("first_name", "last_name", "email", "address")
+
+# React tracks input values itself, so the value is set through the native
+# setter of the element's prototype and followed by an "input" event
+BULK_FILL_JS = """
+for (const [el, val] of arguments[0]) {
+    const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+    setter.call(el, val);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+}
+"""
+
+SET_DATE_JS = """
+const [el, val] = arguments;
+const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+setter.call(el, val);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+# Reads the submitted data from the modal and closes it
+SCRAPE_AND_CLOSE_MODAL_JS = """
+const rows = document.querySelectorAll('.modal-body table tbody tr');
+if (!rows.length) return null;
+const data = {};
+for (const row of rows) data[row.cells[0].innerText.trim()] = row.cells[1].innerText.trim();
+document.querySelector('#closeLargeModal').click();
+return data;
+"""
+
+# Clears the given form fields without reloading the page.
+# Returns false when that isn't possible and a refresh is needed instead.
+RESET_JS = """
+const [sentinel, inputs, clearGender, clearHobbies, selectIds] = arguments;
+const closeModal = document.querySelector('#closeLargeModal');
+if (closeModal) closeModal.click();
+const form = document.querySelector('#userForm');
+if (!form || !document.querySelector('#firstName') || ![sentinel, ...inputs].every(el => el.isConnected)) {
+    return false;
+}
+
+for (const el of inputs) {
+    const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+    setter.call(el, '');
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+if (clearHobbies) {
+    for (const el of form.querySelectorAll("input[type='checkbox']:checked")) el.click();
+}
+if (clearGender) {
+    for (const el of form.querySelectorAll("input[type='radio']:checked")) el.checked = false;
+}
+
+// react-select clears its value on mousedown of the clear indicator
+const selectValue = "[class*='singleValue'], [class*='multiValue']";
+const selects = selectIds.map(s => document.querySelector(s));
+for (const select of selects) {
+    if (!select || !select.querySelector(selectValue)) continue;
+    const indicators = select.querySelectorAll("[class*='indicatorContainer']");
+    if (indicators.length > 1) {
+        indicators[0].dispatchEvent(new MouseEvent('mousedown', {bubbles: true, button: 0}));
+    }
+}
+form.classList.remove('was-validated');
+return selects.every(select => !select || !select.querySelector(selectValue));
+"""
+
+# Fields holding a react-select value, keyed by the id of their container.
+# City goes first, as it depends on the state.
+SELECT_CONTAINERS = {
+    "city": "#city",
+    "state": "#state",
+    "subjects": "#subjectsContainer",
+}
+
 
 class RegistrationFormPage:
     def __init__(self, driver):
@@ -29,49 +127,88 @@ class RegistrationFormPage:
             ]
         }
 
+    def _wait(self, timeout: float = 2) -> WebDriverWait:
+        # Elements usually show up within tens of milliseconds, poll more often than the default 0.5s
+        return WebDriverWait(
+            self.driver,
+            timeout,
+            poll_frequency=0.05,
+            ignored_exceptions=(NoSuchElementException, StaleElementReferenceException),
+        )
+
     def unfill_elements(self):
         for field in self.fields_filled:
             self.fields_filled[field] = False
 
-    def reset(self, accept_consent=True):
-        self.driver.refresh()
-        self.unfill_elements()
-        # self.driver.delete_all_cookies()
-        # self.driver.execute_script("window.localStorage.clear();")
-        # self.driver.execute_script("window.sessionStorage.clear();")
-        self.load_elements(accept_consent)
-
-    def load_elements(self, accept_consent=True):
+    def reset(self, accept_consent=True, hard: bool = False, fields=None):
+        # A soft reset clears only the given fields, by default the filled ones,
+        # which is much cheaper than reloading the page
+        if fields is None:
+            fields = [field for field, filled in self.fields_filled.items() if filled]
+
+        is_cleared = False
+        if not hard:
+            try:
+                is_cleared = self.driver.execute_script(
+                    RESET_JS,
+                    self.first_name,
+                    [
+                        getattr(self, field)
+                        for field in (
+                            *TEXT_FIELDS,
+                            "mobile",
+                            "picture",
+                            "date_of_birth",
+                        )
+                        if field in fields
+                    ],
+                    "gender" in fields,
+                    "hobbies" in fields,
+                    [
+                        selector
+                        for field, selector in SELECT_CONTAINERS.items()
+                        if field in fields
+                    ],
+                )
+            except WebDriverException:
+                # Stale element handles, the page has to be reloaded
+                is_cleared = False
+
+        if is_cleared:
+            for field in fields:
+                self.fields_filled[field] = False
+        else:
+            self.driver.refresh()
+            # self.driver.delete_all_cookies()
+            # self.driver.execute_script("window.localStorage.clear();")
+            # self.driver.execute_script("window.sessionStorage.clear();")
+            self.load_elements(accept_consent)
+            self.unfill_elements()
+
+    def load_elements(self, accept_consent=True, timeout: float = 5):
         if accept_consent:
             self.accept_consent_if_present()
-        self.alphabet = "abcdefghijklmnopqrstuvwxyz"
-        self.first_name = self.driver.find_element(By.CSS_SELECTOR, "input#firstName")
-        self.last_name = self.driver.find_element(By.CSS_SELECTOR, "input#lastName")
-        self.email = self.driver.find_element(By.ID, "userEmail")
-        self.mobile = self.driver.find_element(By.CSS_SELECTOR, "input#userNumber")
-        self.date_of_birth = self.driver.find_element(By.ID, "dateOfBirthInput")
-        self.picture = self.driver.find_element(By.CSS_SELECTOR, "input#uploadPicture")
-        self.subjects = self.driver.find_element(
-            By.CSS_SELECTOR,
-            "input#subjectsInput",
+        # The form is rendered at once, so the submit button being present means the inputs are too
+        self.submit_button = self._wait(timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "#submit"))
         )
-        self.address = self.driver.find_element(
-            By.CSS_SELECTOR, "textarea#currentAddress"
-        )
-        self.dropdown_options_xpath = (
-            ".//div[contains(@class, 'menu')]/div/div[contains(@id, 'option')]"
-        )
-        self.state = self.driver.find_element(
-            By.CSS_SELECTOR, "#state input[type='text']"
-        )
-        self.city = self.driver.find_element(
-            By.CSS_SELECTOR, "#city input[type='text']"
+        self.alphabet = "abcdefghijklmnopqrstuvwxyz"
+        # The menu is rendered with either the options or a "No options" message
+        self.dropdown_menu_css = "div[class*='menu']"
+        self.dropdown_options_css = "div[class*='menu'] > div > div[id*='option']"
+        # Look up every field in a single round-trip instead of one find_element each
+        elements = self.driver.execute_script(
+            "return arguments[0].map(s => document.querySelector(s));",
+            list(ELEMENT_SELECTORS.values()),
         )
-        self.submit_button = self.driver.find_element(By.CSS_SELECTOR, "#submit")
+        for (field, selector), element in zip(ELEMENT_SELECTORS.items(), elements):
+            if element is None:
+                raise NoSuchElementException(f"Unable to locate element: {selector}")
+            setattr(self, field, element)
 
-    def accept_consent_if_present(self, timeout: float = 1.0):
+    def accept_consent_if_present(self, timeout: float = 0.3):
         try:
-            consent_button = WebDriverWait(self.driver, timeout).until(
+            consent_button = self._wait(timeout).until(
                 EC.element_to_be_clickable(
                     (By.CSS_SELECTOR, "button.fc-cta-consent.fc-primary-button")
                 )
@@ -85,10 +222,11 @@ class RegistrationFormPage:
         field = getattr(self, field_name)
         field.send_keys(value)
 
-    def clear_field(self, field_name: str):
-        field = getattr(self, field_name)
-        field.clear()
-        self.fields_filled[field_name] = False
+    def bulk_fill(self, text_fields: dict[str, str]):
+        self.driver.execute_script(
+            BULK_FILL_JS,
+            [[getattr(self, field), value] for field, value in text_fields.items()],
+        )
 
     def scrape_genders(self) -> list[str]:
         return [
@@ -129,45 +267,77 @@ class RegistrationFormPage:
                 element = self.driver.find_element(By.CSS_SELECTOR, hobby_map[hobby])
                 element.click()
 
-    def __select_date_component(self, selector: str, value: str, timeout: float = 2):
-        WebDriverWait(self.driver, timeout).until(
-            EC.element_to_be_clickable((By.XPATH, selector))
-        ).send_keys(value)
-
-    def select_date_of_birth(self, date: datetime.datetime, timeout: float = 3):
-        WebDriverWait(self.driver, timeout).until(
-            EC.element_to_be_clickable(self.date_of_birth)
-        ).click()
-        self.__select_date_component(
-            "//select[@class='react-datepicker__year-select']", date.year
+    def select_date_of_birth(self, date: datetime.datetime):
+        # The datepicker input parses typed dates, so the calendar widget can be skipped.
+        # A date it fails to parse leaves the previous one selected, which the
+        # submission checks in the tests catch.
+        self.driver.execute_script(
+            SET_DATE_JS, self.date_of_birth, date.strftime("%d %b %Y")
         )
-        self.__select_date_component(
-            "//select[@class='react-datepicker__month-select']", date.strftime("%B")
-        )
-        day_xpath = f"//div[contains(@class,'react-datepicker__day') and not(contains(@class,'react-datepicker__day--outside-month')) and text()='{date.day}']"
-        self.driver.find_element(By.XPATH, day_xpath).click()
 
-    def scrape_dropdown_with_alphabet(self, element: WebElement):
-        res = set()
+    def __wait_for_dropdown_menu(self, timeout: float) -> bool:
+        try:
+            self._wait(timeout).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, self.dropdown_menu_css)
+                )
+            )
+        except TimeoutException:
+            return False
+        return True
+
+    def scrape_dropdown(self, element: WebElement, timeout: float = 1) -> list[str]:
+        # Opening the menu renders every option at once, read them all in a single call
+        element.click()
+        options = []
+        if self.__wait_for_dropdown_menu(timeout):
+            options = self.driver.execute_script(
+                "return Array.from(document.querySelectorAll(arguments[0]), e => e.textContent);",
+                self.dropdown_options_css,
+            )
+        element.send_keys(Keys.ESCAPE)
+        # Some dropdowns show no options until something is typed
+        return options or self.scrape_dropdown_with_alphabet(element)
+
+    def scrape_dropdown_with_alphabet(self, element: WebElement, timeout: float = 1):
+        # A dict keeps the options in the order they were first seen
+        res = {}
+        # Erasing the previous letter and typing the next one is a single send_keys call
+        erase = ""
         for letter in self.alphabet:
-            element.send_keys(letter)
+            element.send_keys(erase + letter)
+            erase = Keys.BACK_SPACE
+            if not self.__wait_for_dropdown_menu(timeout):
+                continue
             dropdown_options = self.driver.find_elements(
-                By.XPATH, self.dropdown_options_xpath
+                By.CSS_SELECTOR, self.dropdown_options_css
             )
-            if dropdown_options:
-                res.update(el.text for el in dropdown_options)
-            element.clear()
-        return sorted(res)
+            res.update((el.text, None) for el in dropdown_options)
+        element.send_keys(erase)
+        return list(res)
 
-    def select_from_dropdown(self, element: WebElement, option: str):
+    def select_from_dropdown(
+        self, element: WebElement, option: str, timeout: float = 2
+    ):
         element.send_keys(option)
-        option = self.driver.find_element(
-            By.XPATH, f"{self.dropdown_options_xpath}[contains(., '{option}')]"
+        # The selector stays constant, the typed option is matched on the Python side.
+        # Waits until the menu has re-filtered to the option, stale options are retried
+        matching_option = self._wait(timeout).until(
+            lambda driver: next(
+                (
+                    el
+                    for el in driver.find_elements(
+                        By.CSS_SELECTOR, self.dropdown_options_css
+                    )
+                    if option in el.text
+                ),
+                False,
+            )
         )
-        option.click()
+        matching_option.click()
 
     def scrape_subjects(self) -> list[str]:
-        return self.scrape_dropdown_with_alphabet(self.subjects)
+        return self.scrape_dropdown(self.subjects)
 
     def select_subjects(self, subjects: list[str]):
         for subject in subjects:
@@ -176,11 +346,11 @@ class RegistrationFormPage:
     def scrape_states_and_cities(self) -> dict[str, list[str]]:
         state_city_map = {}
 
-        states = self.scrape_dropdown_with_alphabet(self.state)
+        states = self.scrape_dropdown(self.state)
 
         for state in states:
             self.select_state(state)
-            state_city_map[state] = self.scrape_dropdown_with_alphabet(self.city)
+            state_city_map[state] = self.scrape_dropdown(self.city)
             self.state.clear()
 
         return state_city_map
@@ -194,20 +364,17 @@ class RegistrationFormPage:
     def submit(self):
         self.submit_button.click()
 
-    def verify_submission(self, timeout: float = 1.5) -> bool:
+    def verify_submission(self, timeout: float = 1.5) -> dict[str, str] | None:
+        # Returns the submitted data shown in the modal, or None if the form wasn't submitted
         modal_title_xpath = "//div[@class='modal-title h4' and contains(text(), 'Thanks for submitting the form')]"
         try:
-            WebDriverWait(self.driver, timeout).until(
+            self._wait(timeout).until(
                 EC.visibility_of_element_located((By.XPATH, modal_title_xpath))
             )
         except (TimeoutException, NoSuchElementException):
-            return False
-
-        return True
+            return None
 
-    def close_modal(self):
-        self.driver.find_element(By.CSS_SELECTOR, "#closeLargeModal").click()
+        return self.scrape_and_close_modal()
 
-    def get_modal_text(self, label: str) -> str:
-        xpath = f"//td[text()='{label}']/following-sibling::td"
-        return self.driver.find_element(By.XPATH, xpath).text
+    def scrape_and_close_modal(self) -> dict[str, str] | None:
+        return self.driver.execute_script(SCRAPE_AND_CLOSE_MODAL_JS)
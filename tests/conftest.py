@@ -0,0 +1,49 @@
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from page_objects.registration_page import RegistrationFormPage
+from utilities.browser import get_driver, get_registration_page
+from utilities.possible_values import POSSIBLE_VALUES_PATH, possible_values
+
+# Browser used to seed the possible values cache, handed over to the tests afterwards
+SCRAPE_DRIVER_KEY = pytest.StashKey[WebDriver]()
+
+
+def pytest_configure(config: pytest.Config):
+    # Seed the possible values cache once, before pytest-xdist spawns its workers,
+    # so that the workers only have to read it when importing the test module
+    if hasattr(config, "workerinput"):
+        return
+
+    # Without workers the tests run in this process and reuse the scraping browser,
+    # saving a second Chrome cold start
+    if not config.getoption("numprocesses", None) and not POSSIBLE_VALUES_PATH.exists():
+        drv = get_driver()
+        config.stash[SCRAPE_DRIVER_KEY] = drv
+        possible_values(driver=drv)
+    else:
+        possible_values()
+
+
+def pytest_unconfigure(config: pytest.Config):
+    # The scraping browser is still here if no test requested a driver
+    drv = config.stash.get(SCRAPE_DRIVER_KEY, None)
+    if drv is not None:
+        drv.quit()
+
+
+# Under pytest-xdist every worker runs its own session, so each worker gets its own Chrome
+@pytest.fixture(scope="session")
+def driver(pytestconfig: pytest.Config):
+    drv = pytestconfig.stash.get(SCRAPE_DRIVER_KEY, None)
+    if drv is None:
+        drv = get_driver()
+    else:
+        del pytestconfig.stash[SCRAPE_DRIVER_KEY]
+    yield drv
+    drv.quit()
+
+
+@pytest.fixture(scope="session")
+def registration_page(driver: WebDriver) -> RegistrationFormPage:
+    return get_registration_page(driver)
@@ -0,0 +1,34 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from page_objects.registration_page import RegistrationFormPage
+from utilities.ublock import download_and_extract_latest_ublock
+
+
+def get_driver() -> WebDriver:
+    chrome_options = Options()
+    prefs = {"profile.managed_default_content_settings.images": 2}
+    chrome_options.add_experimental_option("prefs", prefs)
+    # chrome_options.add_argument("force-device-scale-factor=0.75")
+    # chrome_options.add_argument("high-dpi-support=0.75")
+    for argument in (
+        "--headless=new",
+        # Set the size at launch instead of a maximize_window() call
+        "--window-size=1920,1080",
+        "--disable-gpu",
+        "--disable-dev-shm-usage",
+        "--no-sandbox",
+        "--disable-background-networking",
+        "--disable-features=Translate,BackForwardCache",
+        "--blink-settings=imagesEnabled=false",
+    ):
+        chrome_options.add_argument(argument)
+    extension_path = download_and_extract_latest_ublock()
+    chrome_options.add_argument(f"--load-extension={extension_path}")
+    return webdriver.Chrome(options=chrome_options)
+
+
+def get_registration_page(drv: WebDriver) -> RegistrationFormPage:
+    drv.get("https://demoqa.com/automation-practice-form")
+    return RegistrationFormPage(drv)
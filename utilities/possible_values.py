@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from filelock import FileLock
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utilities.browser import get_driver, get_registration_page
+
+POSSIBLE_VALUES_PATH = Path(__file__).parent.parent / "tests" / "possible_values.json"
+
+
+def possible_values(
+    use_cache: bool = True,
+    cache_path: Path = POSSIBLE_VALUES_PATH,
+    driver: WebDriver | None = None,
+) -> dict[str, Any]:
+    # Concurrent callers wait for the first one to scrape the form, then read its cache
+    with FileLock(cache_path.with_suffix(".lock")):
+        if not use_cache or not cache_path.exists():
+            # A passed in driver is left running for the caller to reuse
+            drv = driver or get_driver()
+            page = get_registration_page(drv)
+            possible_values = {
+                "genders": page.scrape_genders(),
+                "hobbies": page.scrape_hobbies(),
+                "subjects": page.scrape_subjects(),
+                "state_city_map": page.scrape_states_and_cities(),
+            }
+            page.reset()
+            if driver is None:
+                drv.quit()
+            with open(cache_path, "wt", encoding="utf-8") as fp:
+                json.dump(possible_values, fp, indent=4, ensure_ascii=False)
+
+        with open(cache_path, "rt", encoding="utf-8") as fp:
+            possible_values = json.load(fp)
+
+    return possible_values
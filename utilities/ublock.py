@@ -1,15 +1,25 @@
+import io
 import shutil
 from pathlib import Path
 from zipfile import ZipFile
 
 import requests
+from filelock import FileLock
 
 UBLOCK_DIR = Path(__file__).parent / "ublock"
+# Kept outside UBLOCK_DIR, which gets wiped when a new release is fetched
+UBLOCK_LOCK = UBLOCK_DIR.with_suffix(".lock")
 
 
 def download_and_extract_latest_ublock():
-    # Get the latest release URL
-    response = requests.get(
+    # Parallel test workers share the extension directory, only one of them downloads it
+    with FileLock(UBLOCK_LOCK):
+        return _download_and_extract_latest_ublock()
+
+
+def _download_and_extract_latest_ublock():
+    # Get the latest release URL, only the redirect target is needed
+    response = requests.head(
         "https://github.com/gorhill/uBlock/releases/latest", allow_redirects=True
     )
     latest_version_tag = response.url.split("/")[-1]
@@ -28,18 +38,17 @@ def download_and_extract_latest_ublock():
     # Construct the download URL for the Chromium zip file
     download_url = f"https://github.com/gorhill/uBlock/releases/download/{latest_version_tag}/uBlock0_{latest_version_tag}.chromium.zip"
 
-    # Download the zip file
-    response = requests.get(download_url)
-    zip_path = UBLOCK_DIR / f"uBlock0_{latest_version_tag}.chromium.zip"
+    # Download the zip file into memory, there's no temporary file to clean up
+    buffer = io.BytesIO()
 
-    with open(zip_path, "wb") as f:
-        f.write(response.content)
+    with requests.get(download_url, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        shutil.copyfileobj(response.raw, buffer, length=1024 * 1024)
 
     # Extract the zip file
-    with ZipFile(zip_path, "r") as zip_ref:
+    buffer.seek(0)
+    with ZipFile(buffer, "r") as zip_ref:
         zip_ref.extractall(extract_path)
 
-    # Clean up the zip file
-    zip_path.unlink()
-
     return full_path